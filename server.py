@@ -1,17 +1,32 @@
 import asyncio
+import ctypes
+import functools
+import logging
 import os
+import queue
+import re
 import string
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 
-from fastapi import FastAPI, WebSocket, HTTPException
+from fastapi import FastAPI, Request, WebSocket, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse
 import uvicorn
 import winpty
 
+from winfind import scandir_fast
+
 # -----------------------------
 # App
 # -----------------------------
-app = FastAPI()
+# orjson serializes the plain dicts we return several times faster than the
+# stdlib encoder; large directory listings are dominated by JSON encoding.
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,19 +39,50 @@ app.add_middleware(
 # -----------------------------
 # Helpers (Windows "This PC" style)
 # -----------------------------
+# Interned once so every listing row shares the same three value objects
+# instead of allocating fresh kind strings per entry.
+_DIR = sys.intern("dir")
+_FILE = sys.intern("file")
+_DRIVE = sys.intern("drive")
+
+# Probing absent optical/network drive letters with Path.exists() can block for
+# seconds while Windows spins up the device, so ask the kernel for the drive
+# bitmask in one call and keep the answer for a few seconds.
+_DRIVES_TTL = 2.0
+_drives_cache = None
+
+# Built once at import so a cache refresh reuses these instead of allocating
+# 26 Path objects and fresh row dicts every time.
+_DRIVE_ROOTS = [(letter, Path(f"{letter}:/")) for letter in string.ascii_uppercase]
+_DRIVE_INFO = {
+    letter: {
+        "name": f"{letter}:",
+        "path": f"{letter}:",
+        "is_dir": True,
+        "kind": _DRIVE,
+    }
+    for letter in string.ascii_uppercase
+}
+
+
 def list_drives():
+    global _drives_cache
+    now = time.monotonic()
+    if _drives_cache is not None and now - _drives_cache[0] < _DRIVES_TTL:
+        return _drives_cache[1]
+
     drives = []
-    for letter in string.ascii_uppercase:
-        root = Path(f"{letter}:/")
-        if root.exists():
-            drives.append(
-                {
-                    "name": f"{letter}:",
-                    "path": f"{letter}:",
-                    "is_dir": True,
-                    "kind": "drive",
-                }
-            )
+    if os.name == "nt":
+        mask = ctypes.windll.kernel32.GetLogicalDrives()
+        for i in range(26):
+            if mask & (1 << i):
+                drives.append(_DRIVE_INFO[chr(ord("A") + i)])
+    else:
+        for letter, root in _DRIVE_ROOTS:
+            if root.exists():
+                drives.append(_DRIVE_INFO[letter])
+
+    _drives_cache = (now, drives)
     return drives
 
 
@@ -46,11 +92,37 @@ def to_api_path(p: Path) -> str:
     return p.as_posix()
 
 
+# Request threads drop records on a queue and return immediately; a single
+# listener thread does the actual stdout writes, so logging never serializes
+# handlers behind a stdout flush.
+_log = logging.getLogger("stellara")
+# Loggers are process-global but this module gets imported twice under
+# "python server.py" (once as __main__, again by uvicorn.run("server:app")),
+# so only wire up the queue and listener on the first import.
+if not _log.handlers:
+    _log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+    _log_listener.start()
+
+    _log.addHandler(QueueHandler(_log_queue))
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+
+_fs_log = logging.getLogger("stellara.fs")
+_ws_log = logging.getLogger("stellara.ws")
+
+
 def log_fs(action: str, path: str, status: str, detail: str = "") -> None:
-    msg = f"[fs] action={action} path='{path}' status={status}"
+    # %-style args so no message string is built when the level is disabled;
+    # this runs on every /files hit.
     if detail:
-        msg = f"{msg} detail={detail}"
-    print(msg)
+        _fs_log.info("[fs] action=%s path='%s' status=%s detail=%s", action, path, status, detail)
+    else:
+        _fs_log.info("[fs] action=%s path='%s' status=%s", action, path, status)
+
+
+# Matches "C:" (drive root) or "C:/Something" in one pass.
+_PATH_RE = re.compile(r"^([A-Za-z]):(?:/(.*))?$")
 
 
 def resolve_path(path: str) -> Path:
@@ -68,42 +140,44 @@ def resolve_path(path: str) -> Path:
     if raw == "":
         raise HTTPException(status_code=400, detail="Empty path is only valid for listing drives")
 
-    raw = raw.replace("\\", "/")
+    m = _PATH_RE.match(raw.replace("\\", "/"))
+    if not m:
+        raise HTTPException(
+            status_code=400,
+            detail="Path must look like C: or C:/Something",
+        )
 
-    # Drive root token like "C:"
-    if len(raw) == 2 and raw[1] == ":" and raw[0].isalpha():
-        return Path(f"{raw[0].upper()}:/")
-
-    # Absolute-ish windows path like "C:/Users"
-    if len(raw) >= 3 and raw[1] == ":" and raw[2] == "/" and raw[0].isalpha():
-        return Path(raw[0].upper() + raw[1:])
-
-    raise HTTPException(
-        status_code=400,
-        detail="Path must look like C: or C:/Something",
-    )
+    letter = m.group(1).upper()
+    rest = m.group(2) or ""
+    return Path(f"{letter}:/{rest}")
 
 
 def iter_dir(dir_path: Path):
     try:
+        base = to_api_path(dir_path).rstrip("/")
         items = []
-        for entry in dir_path.iterdir():
-            try:
-                items.append(
+        # scandir_fast answers is_dir straight from the enumeration data
+        # (FindExInfoBasic + large fetch on Windows: no 8.3 short-name
+        # lookups, fewer kernel round-trips per directory).
+        for name, is_dir in scandir_fast(dir_path):
+            # Decorated with the sort key up front, so sorting compares plain
+            # tuples instead of running a lambda and lowercasing per comparison.
+            items.append(
+                (
+                    not is_dir,
+                    name.lower(),
                     {
-                        "name": entry.name,
-                        "path": to_api_path(entry),
-                        "is_dir": entry.is_dir(),
-                        "kind": "dir" if entry.is_dir() else "file",
-                    }
+                        "name": name,
+                        "path": f"{base}/{name}",
+                        "is_dir": is_dir,
+                        "kind": _DIR if is_dir else _FILE,
+                    },
                 )
-            except PermissionError:
-                # Skip entries you don't have permission to stat
-                continue
+            )
 
         # Folders first, then name
-        items.sort(key=lambda x: (not x["is_dir"], x["name"].lower()))
-        return items
+        items.sort(key=itemgetter(0, 1))
+        return [entry[2] for entry in items]
     except PermissionError:
         raise HTTPException(status_code=403, detail="Permission denied")
     except FileNotFoundError:
@@ -121,22 +195,49 @@ def home():
 # -----------------------------
 # File Explorer API
 # -----------------------------
+
+# All blocking filesystem work goes through one bounded pool sized to disk
+# parallelism, instead of the default executor shared with everything else;
+# bursty /files polling can't spawn unbounded threads or thrash the disk.
+_FS_EXEC = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fs")
+
+
+def _in_fs_thread(func, /, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(_FS_EXEC, functools.partial(func, *args, **kwargs))
+
+
+# Listings are cached per (path, mtime_ns): one stat serves an unchanged
+# directory from memory, and a changed mtime simply keys a fresh entry while
+# the stale one ages out of the LRU.
+@functools.lru_cache(maxsize=256)
+def _iter_dir_cached(path: str, mtime_ns: int):
+    return iter_dir(Path(path))
+
+
+def _list_dir(dir_path: Path):
+    # Blocking half of /files: existence checks, cache lookup, enumeration.
+    # Runs in a worker thread so the event loop stays responsive.
+    if not dir_path.exists():
+        raise HTTPException(status_code=404, detail="Not found")
+    if not dir_path.is_dir():
+        raise HTTPException(status_code=400, detail="Not a directory")
+
+    st = dir_path.stat()
+    return _iter_dir_cached(str(dir_path), st.st_mtime_ns)
+
+
 @app.get("/files")
-def files(path: str = ""):
+async def files(path: str = ""):
     try:
         # Root = "This PC" (drive list)
         if path.strip() == "":
-            result = list_drives()
+            result = await _in_fs_thread(list_drives)
             log_fs("list", "Root", "success", f"count={len(result)}")
             return result
 
         dir_path = resolve_path(path)
-        if not dir_path.exists():
-            raise HTTPException(status_code=404, detail="Not found")
-        if not dir_path.is_dir():
-            raise HTTPException(status_code=400, detail="Not a directory")
-
-        result = iter_dir(dir_path)
+        result = await _in_fs_thread(_list_dir, dir_path)
         log_fs("list", path, "success", f"count={len(result)}")
         return result
     except Exception as e:
@@ -144,16 +245,31 @@ def files(path: str = ""):
         raise
 
 
+# Cap what the JSON editor endpoint will load into memory; bigger files
+# should go through /file/raw which streams straight from disk.
+_MAX_FILE_BYTES = 5_000_000
+
+
+def _read_text(file_path: Path) -> str:
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Not found")
+    if file_path.is_dir():
+        raise HTTPException(status_code=400, detail="Not a file")
+
+    if file_path.stat().st_size > _MAX_FILE_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    # Read bytes and decode once instead of text-mode decoding on the way in.
+    # Normalize CRLF like text mode did: the write path translates \n back to
+    # os.linesep, so returning raw \r\n would grow a \r per save round trip.
+    return file_path.read_bytes().decode("utf-8", "ignore").replace("\r\n", "\n")
+
+
 @app.get("/file")
-def read_file(path: str):
+async def read_file(path: str):
     try:
         file_path = resolve_path(path)
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="Not found")
-        if file_path.is_dir():
-            raise HTTPException(status_code=400, detail="Not a file")
-
-        content = file_path.read_text(encoding="utf-8", errors="ignore")
+        content = await _in_fs_thread(_read_text, file_path)
         log_fs("read", path, "success")
         return {"content": content}
     except Exception as e:
@@ -161,12 +277,48 @@ def read_file(path: str):
         raise
 
 
+def _check_file(file_path: Path) -> None:
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Not found")
+    if file_path.is_dir():
+        raise HTTPException(status_code=400, detail="Not a file")
+
+
+@app.get("/file/raw")
+async def read_file_raw(path: str):
+    try:
+        file_path = resolve_path(path)
+        await _in_fs_thread(_check_file, file_path)
+        log_fs("read_raw", path, "success")
+        return FileResponse(file_path)
+    except Exception as e:
+        log_fs("read_raw", path, "error", str(e))
+        raise
+
+
+def _write_text(file_path: Path, content: str) -> None:
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(content, encoding="utf-8", errors="ignore")
+
+
 @app.post("/file")
-def write_file(path: str, content: str = ""):
+async def write_file(path: str, request: Request, content: str | None = None):
     file_path = resolve_path(path)
     try:
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content, encoding="utf-8", errors="ignore")
+        if content is not None:
+            # Small text saves from the editor still arrive as a query param.
+            await _in_fs_thread(_write_text, file_path, content)
+        else:
+            # Otherwise stream the raw request body to disk chunk by chunk so
+            # large uploads are never buffered whole in memory.
+            await _in_fs_thread(file_path.parent.mkdir, parents=True, exist_ok=True)
+            f = await _in_fs_thread(open, file_path, "wb")
+            try:
+                async for chunk in request.stream():
+                    if chunk:
+                        await _in_fs_thread(f.write, chunk)
+            finally:
+                await _in_fs_thread(f.close)
         log_fs("write", path, "success")
         return {"status": "saved"}
     except Exception as e:
@@ -177,10 +329,10 @@ def write_file(path: str, content: str = ""):
 
 
 @app.post("/mkdir")
-def make_dir(path: str):
+async def make_dir(path: str):
     dir_path = resolve_path(path)
     try:
-        dir_path.mkdir(parents=True, exist_ok=True)
+        await _in_fs_thread(dir_path.mkdir, parents=True, exist_ok=True)
         log_fs("mkdir", path, "success")
         return {"status": "created"}
     except Exception as e:
@@ -190,26 +342,30 @@ def make_dir(path: str):
         raise
 
 
-@app.delete("/file")
-def delete_path(path: str):
-    target = resolve_path(path)
+def _delete(target: Path) -> None:
     if not target.exists():
         raise HTTPException(status_code=404, detail="Not found")
 
+    if target.is_dir():
+        # only deletes empty dirs
+        target.rmdir()
+    else:
+        target.unlink()
+
+
+@app.delete("/file")
+async def delete_path(path: str):
+    target = resolve_path(path)
     try:
-        if target.is_dir():
-            # only deletes empty dirs
-            target.rmdir()
-        else:
-            target.unlink()
+        await _in_fs_thread(_delete, target)
         log_fs("delete", path, "success")
         return {"status": "deleted"}
-    except OSError:
-        log_fs("delete", path, "error", "Directory not empty (or in use)")
-        raise HTTPException(status_code=400, detail="Directory not empty (or in use)")
     except PermissionError:
         log_fs("delete", path, "error", "Permission denied")
         raise HTTPException(status_code=403, detail="Permission denied")
+    except OSError:
+        log_fs("delete", path, "error", "Directory not empty (or in use)")
+        raise HTTPException(status_code=400, detail="Directory not empty (or in use)")
 
 
 # -----------------------------
@@ -220,7 +376,7 @@ async def terminal(ws: WebSocket, session_id: str):
     await ws.accept()
     client = ws.client
     client_addr = f"{client.host}:{client.port}" if client else "unknown"
-    print(f"[ws] connect session_id={session_id} client={client_addr}")
+    _ws_log.info("[ws] connect session_id=%s client=%s", session_id, client_addr)
 
     try:
         pty = winpty.PtyProcess.spawn("powershell.exe")
@@ -229,26 +385,78 @@ async def terminal(ws: WebSocket, session_id: str):
         await ws.close()
         return
 
+    # Dedicated pool so PTY I/O never contends with the default executor
+    # (shared by asyncio.to_thread users like the FS endpoints). Two workers:
+    # the read blocks for long stretches and must not stall writes.
+    pty_exec = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"pty-{session_id}")
+    loop = asyncio.get_running_loop()
+
+    # Bounded so a stalled client can't queue shell output without limit;
+    # on overflow the oldest chunk is dropped rather than blocking the pump.
+    out_q: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump_shell():
+        while True:
+            try:
+                # ConPTY tends to deliver many tiny reads; a big read size
+                # amortizes more bytes per Python round-trip.
+                data = await loop.run_in_executor(pty_exec, pty.read, 65536)
+            except asyncio.CancelledError:
+                # Normal cancellation during shutdown
+                break
+            except Exception:
+                break
+            if data:
+                if isinstance(data, bytes):
+                    data = data.decode(errors="ignore")
+                try:
+                    out_q.put_nowait(data)
+                except asyncio.QueueFull:
+                    try:
+                        out_q.get_nowait()  # drop oldest
+                    except asyncio.QueueEmpty:
+                        pass
+                    out_q.put_nowait(data)
+
     async def read_from_shell():
+        # Task-local scratch: chunks are collected here and joined/decoded in
+        # one pass per send instead of allocating per read. pywinpty hands us
+        # str already, so a bytes scratch would only add an encode round-trip.
+        burst = False
         while True:
             try:
-                data = await asyncio.to_thread(pty.read, 4096)
-                if data:
-                    if isinstance(data, bytes):
-                        data = data.decode(errors="ignore")
-                    await ws.send_text(data)
+                pending = [await out_q.get()]
+                total = len(pending[0])
+                # Coalesce whatever else arrives within 10ms (or up to 64KB)
+                # into a single WebSocket frame. In single-chunk steady state
+                # (interactive typing) skip the wait so echo stays snappy.
+                while total < 65536:
+                    try:
+                        data = out_q.get_nowait()
+                    except asyncio.QueueEmpty:
+                        if not burst:
+                            break
+                        try:
+                            data = await asyncio.wait_for(out_q.get(), 0.01)
+                        except asyncio.TimeoutError:
+                            break
+                    pending.append(data)
+                    total += len(data)
+                burst = len(pending) > 1
+                await ws.send_text(pending[0] if len(pending) == 1 else "".join(pending))
             except asyncio.CancelledError:
                 # Normal cancellation during shutdown
                 break
             except Exception:
                 break
 
+    pump = asyncio.create_task(pump_shell())
     reader = asyncio.create_task(read_from_shell())
 
     try:
         while True:
             data = await ws.receive_text()
-            await asyncio.to_thread(pty.write, data)
+            await loop.run_in_executor(pty_exec, pty.write, data)
     except asyncio.CancelledError:
         # Normal shutdown on Ctrl+C
         pass
@@ -264,17 +472,20 @@ async def terminal(ws: WebSocket, session_id: str):
         except Exception:
             pass
         
-        # Cancel reader task and await it to suppress CancelledError noise
+        # Cancel pump/reader tasks and await them to suppress CancelledError noise
+        pump.cancel()
         reader.cancel()
-        try:
-            await reader
-        except asyncio.CancelledError:
-            # Expected during shutdown - suppress noise
-            pass
-        except Exception:
-            pass
-        
-        print(f"[ws] disconnect session_id={session_id} client={client_addr}")
+        for task in (pump, reader):
+            try:
+                await task
+            except asyncio.CancelledError:
+                # Expected during shutdown - suppress noise
+                pass
+            except Exception:
+                pass
+
+        pty_exec.shutdown(wait=False)
+        _ws_log.info("[ws] disconnect session_id=%s client=%s", session_id, client_addr)
 
 
 if __name__ == "__main__":
@@ -284,5 +495,27 @@ if __name__ == "__main__":
     host = os.getenv("SERVER_HOST", "0.0.0.0")
     port = 5000
     token_enabled = bool(os.getenv("SERVER_TOKEN"))
+
+    # uvloop when available (not on Windows); the Proactor loop is slow for
+    # many small sends, so prefer the selector loop there.
+    try:
+        import uvloop  # noqa: F401
+
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+        if os.name == "nt":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
     print(f"[server] starting host={host} port={port} token_enabled={token_enabled}")
-    uvicorn.run("server:app", host=host, port=port)
+    # permessage-deflate is pure CPU loss on the terminal firehose.
+    uvicorn.run(
+        "server:app",
+        host=host,
+        port=port,
+        loop=loop_impl,
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,
+        ws_max_size=2**20,
+    )